@@ -0,0 +1,40 @@
+"""Use native uuid columns for conversation, message, and chunk ids
+
+Revision ID: 5c1f0e9a7b42
+Revises: 74e8de838d2e
+Create Date: 2026-10-14 10:48:03.117524
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0e9a7b42'
+down_revision: Union[str, Sequence[str], None] = '74e8de838d2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The FK has to go while both sides change type
+    op.drop_constraint('messages_conversation_id_fkey', 'messages', type_='foreignkey')
+    op.alter_column('conversations', 'id', type_=postgresql.UUID(as_uuid=True), postgresql_using='id::uuid')
+    op.alter_column('messages', 'id', type_=postgresql.UUID(as_uuid=True), postgresql_using='id::uuid')
+    op.alter_column('messages', 'conversation_id', type_=postgresql.UUID(as_uuid=True), postgresql_using='conversation_id::uuid')
+    op.alter_column('document_chunks', 'id', type_=postgresql.UUID(as_uuid=True), postgresql_using='id::uuid')
+    op.create_foreign_key('messages_conversation_id_fkey', 'messages', 'conversations', ['conversation_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('messages_conversation_id_fkey', 'messages', type_='foreignkey')
+    op.alter_column('document_chunks', 'id', type_=sa.String(), postgresql_using='id::text')
+    op.alter_column('messages', 'conversation_id', type_=sa.String(), postgresql_using='conversation_id::text')
+    op.alter_column('messages', 'id', type_=sa.String(), postgresql_using='id::text')
+    op.alter_column('conversations', 'id', type_=sa.String(), postgresql_using='id::text')
+    op.create_foreign_key('messages_conversation_id_fkey', 'messages', 'conversations', ['conversation_id'], ['id'], ondelete='CASCADE')
@@ -0,0 +1,28 @@
+"""Add composite index on messages (conversation_id, created_at)
+
+Revision ID: 74e8de838d2e
+Revises: 8db65c099ac1
+Create Date: 2026-10-14 10:12:41.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '74e8de838d2e'
+down_revision: Union[str, Sequence[str], None] = '8db65c099ac1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_messages_conv_created', 'messages', ['conversation_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_conv_created', table_name='messages')
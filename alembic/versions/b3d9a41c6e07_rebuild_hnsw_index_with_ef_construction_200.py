@@ -0,0 +1,43 @@
+"""Rebuild the HNSW embedding index with ef_construction=200
+
+Revision ID: b3d9a41c6e07
+Revises: 5c1f0e9a7b42
+Create Date: 2026-10-14 11:20:37.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9a41c6e07'
+down_revision: Union[str, Sequence[str], None] = '5c1f0e9a7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_hnsw_index(ef_construction: int) -> None:
+    op.create_index(
+        'hnsw_embedding_idx',
+        'document_chunks',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': ef_construction},
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The index was first created outside of migrations, so it may not exist
+    op.execute("DROP INDEX IF EXISTS hnsw_embedding_idx")
+    _create_hnsw_index(ef_construction=200)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('hnsw_embedding_idx', table_name='document_chunks')
+    _create_hnsw_index(ef_construction=64)
@@ -0,0 +1,54 @@
+"""Store chunk embeddings as halfvec
+
+Revision ID: e6a2f8d01c93
+Revises: b3d9a41c6e07
+Create Date: 2026-10-14 11:52:19.283640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a2f8d01c93'
+down_revision: Union[str, Sequence[str], None] = 'b3d9a41c6e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_hnsw_index(opclass: str) -> None:
+    op.create_index(
+        'hnsw_embedding_idx',
+        'document_chunks',
+        ['embedding'],
+        unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 200},
+        postgresql_ops={'embedding': opclass},
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Requires the pgvector extension at 0.7.0 or newer
+    op.drop_index('hnsw_embedding_idx', table_name='document_chunks')
+    op.alter_column(
+        'document_chunks', 'embedding',
+        type_=pgvector.sqlalchemy.HALFVEC(dim=384),
+        postgresql_using='embedding::halfvec(384)',
+    )
+    _create_hnsw_index('halfvec_cosine_ops')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('hnsw_embedding_idx', table_name='document_chunks')
+    op.alter_column(
+        'document_chunks', 'embedding',
+        type_=pgvector.sqlalchemy.vector.VECTOR(dim=384),
+        postgresql_using='embedding::vector(384)',
+    )
+    _create_hnsw_index('vector_cosine_ops')
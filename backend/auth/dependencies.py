@@ -1,10 +1,11 @@
 import os
+from dataclasses import dataclass
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.db.database import get_db
 from backend.db.crud import get_user, create_user
-from backend.db.models import User
 
 # Optional fallback logic for local testing without Firebase
 MOCK_TEST_USER_ID = "mock_test_user_123"
@@ -15,10 +16,42 @@ init_firebase()
 
 security = HTTPBearer()
 
+# User rows never change after creation, so authenticated requests resolve the
+# caller from this cache instead of issuing a SELECT against the users table.
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL = 300  # seconds
+
+
+@dataclass(frozen=True)
+class UserContext:
+    """Session-independent view of the authenticated user."""
+    id: str
+    email: str
+
+
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+async def _get_or_create_user(db: AsyncSession, user_id: str, email: str) -> UserContext:
+    """Resolve a user from the cache, falling back to the database (creating the row if needed)."""
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    db_user = await get_user(db, user_id=user_id)
+    if not db_user:
+        db_user = await create_user(db, user_id=user_id, email=email)
+        print(f"Created new database user: {email} ({user_id})")
+
+    user = UserContext(id=db_user.id, email=db_user.email)
+    _user_cache[user_id] = user
+    return user
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> UserContext:
     """
     FastAPI dependency to verify the Firebase ID token in the Authorization header.
     If the user doesn't exist in our PostgreSQL database yet, it automatically creates them.
@@ -38,20 +71,12 @@ async def get_current_user(
             )
             
         # Get or create the user in our PostgreSQL database
-        db_user = await get_user(db, user_id=uid)
-        if not db_user:
-            db_user = await create_user(db, user_id=uid, email=email)
-            print(f"Created new database user: {email} ({uid})")
-            
-        return db_user
+        return await _get_or_create_user(db, user_id=uid, email=email)
         
     except ValueError as e:
         # Check if we're in a specific bypass mode for local CLI eval-harness testing
         if os.getenv("TEST_MODE") == "True" and token == "test-token":
-             db_user = await get_user(db, user_id=MOCK_TEST_USER_ID)
-             if not db_user:
-                 db_user = await create_user(db, user_id=MOCK_TEST_USER_ID, email="test@local.dev")
-             return db_user
+             return await _get_or_create_user(db, user_id=MOCK_TEST_USER_ID, email="test@local.dev")
              
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,7 +1,21 @@
 import firebase_admin
 from firebase_admin import credentials, auth
+from cachetools import TLRUCache
+import hashlib
+import time
 import os
 
+# Verified tokens are reused until shortly before their own `exp` claim, so
+# repeat requests from a logged-in user skip the RSA signature check.
+TOKEN_CACHE_SIZE = 10_000
+TOKEN_EXPIRY_LEEWAY = 30  # seconds before `exp` at which a cached token is dropped
+
+_token_cache = TLRUCache(
+    maxsize=TOKEN_CACHE_SIZE,
+    ttu=lambda _key, decoded, now: decoded["exp"] - TOKEN_EXPIRY_LEEWAY,
+    timer=time.time,
+)
+
 def init_firebase():
     """Initialize the Firebase Admin SDK using the serviceAccountKey.json"""
     # The default path is the root of the project
@@ -21,8 +35,16 @@ def init_firebase():
 
 def verify_token(id_token: str) -> dict:
     """Verify a Firebase ID token and return the decoded payload."""
+    # Key on a digest so raw bearer tokens are never held in memory
+    cache_key = hashlib.blake2b(id_token.encode()).digest()
+    decoded_token = _token_cache.get(cache_key)
+    if decoded_token is not None:
+        return decoded_token
+
     try:
         decoded_token = auth.verify_id_token(id_token)
-        return decoded_token
     except Exception as e:
         raise ValueError(f"Invalid Firebase ID token: {str(e)}")
+
+    _token_cache[cache_key] = decoded_token
+    return decoded_token
@@ -18,6 +18,15 @@ CHUNK_SIZE = 500          # Target chunk size in characters
 CHUNK_OVERLAP = 100       # Overlap between chunks in characters
 TOP_K = 5                 # Number of chunks to retrieve
 SIMILARITY_THRESHOLD = 0.3  # Minimum similarity score to consider relevant
+HNSW_EF_SEARCH = 80       # HNSW candidate list size per query (pgvector default is 40)
+
+# Conversation history sent to the LLM (tokens, cl100k_base)
+HISTORY_TOKEN_BUDGET = 1024        # Total across all prior messages
+HISTORY_MESSAGE_TOKEN_LIMIT = 128  # Per assistant reply (~500 characters)
+
+# Semantic response cache (POST /query)
+SEMANTIC_CACHE_THRESHOLD = 0.95  # Minimum cosine similarity to reuse a cached answer
+SEMANTIC_CACHE_SIZE = 10_000     # Cached questions kept per worker (LRU)
 
 # Paths
 DOCS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "docs")
@@ -28,3 +37,6 @@ FAISS_INDEX_PATH = os.path.join(DATA_DIR, "faiss_index")
 # Embedding Model
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 EMBEDDING_DIM = 384
+# Where fastembed keeps the downloaded ONNX model. Its default lives under the
+# system temp dir, which is often wiped, forcing a re-download on restart.
+EMBEDDING_CACHE_DIR = os.getenv("FASTEMBED_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".fastembed_cache"))
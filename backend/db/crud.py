@@ -1,33 +1,45 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import desc
+from sqlalchemy import desc, insert, update, func
+from sqlalchemy.orm import selectinload
 from backend.db.models import User, Conversation, Message
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from datetime import timedelta
+from uuid import UUID
 
 # --- Users ---
 
-async def get_user(db: AsyncSession, user_id: str) -> Optional[User]:
-    result = await db.execute(select(User).filter(User.id == user_id))
+async def get_user(db: AsyncSession, user_id: str, with_conversations: bool = False) -> Optional[User]:
+    # Only eager-load for callers that will traverse user.conversations
+    stmt = select(User).filter(User.id == user_id)
+    if with_conversations:
+        stmt = stmt.options(selectinload(User.conversations))
+    result = await db.execute(stmt)
     return result.scalar_one_or_none()
 
 async def create_user(db: AsyncSession, user_id: str, email: str) -> User:
-    db_user = User(id=user_id, email=email)
-    db.add(db_user)
+    # RETURNING hands back server defaults in the same round trip, so no refresh is needed
+    result = await db.execute(insert(User).values(id=user_id, email=email).returning(User))
+    db_user = result.scalar_one()
     await db.commit()
-    await db.refresh(db_user)
     return db_user
 
 # --- Conversations ---
 
-async def get_user_conversations(db: AsyncSession, user_id: str) -> List[Conversation]:
-    result = await db.execute(
+async def get_user_conversations(db: AsyncSession, user_id: str, with_messages: bool = False) -> List[Conversation]:
+    stmt = (
         select(Conversation)
         .filter(Conversation.user_id == user_id)
         .order_by(desc(Conversation.updated_at))
     )
+    # Loads every conversation's messages in one extra SELECT ... IN instead of one per conversation.
+    # Off by default: the sidebar only needs id/title/updated_at.
+    if with_messages:
+        stmt = stmt.options(selectinload(Conversation.messages))
+    result = await db.execute(stmt)
     return list(result.scalars().all())
 
-async def get_conversation(db: AsyncSession, conversation_id: str, user_id: str) -> Optional[Conversation]:
+async def get_conversation(db: AsyncSession, conversation_id: UUID, user_id: str) -> Optional[Conversation]:
     result = await db.execute(
         select(Conversation)
         .filter(Conversation.id == conversation_id, Conversation.user_id == user_id)
@@ -35,13 +47,12 @@ async def get_conversation(db: AsyncSession, conversation_id: str, user_id: str)
     return result.scalar_one_or_none()
 
 async def create_conversation(db: AsyncSession, user_id: str, title: str = "New Chat") -> Conversation:
-    db_conv = Conversation(user_id=user_id, title=title)
-    db.add(db_conv)
+    result = await db.execute(insert(Conversation).values(user_id=user_id, title=title).returning(Conversation))
+    db_conv = result.scalar_one()
     await db.commit()
-    await db.refresh(db_conv)
     return db_conv
 
-async def update_conversation(db: AsyncSession, conversation_id: str, user_id: str, new_title: str) -> Optional[Conversation]:
+async def update_conversation(db: AsyncSession, conversation_id: UUID, user_id: str, new_title: str) -> Optional[Conversation]:
     conv = await get_conversation(db, conversation_id, user_id)
     if conv:
         conv.title = new_title
@@ -50,7 +61,7 @@ async def update_conversation(db: AsyncSession, conversation_id: str, user_id: s
         return conv
     return None
 
-async def delete_conversation(db: AsyncSession, conversation_id: str, user_id: str) -> bool:
+async def delete_conversation(db: AsyncSession, conversation_id: UUID, user_id: str) -> bool:
     conv = await get_conversation(db, conversation_id, user_id)
     if conv:
         await db.delete(conv)
@@ -60,7 +71,7 @@ async def delete_conversation(db: AsyncSession, conversation_id: str, user_id: s
 
 # --- Messages ---
 
-async def get_conversation_messages(db: AsyncSession, conversation_id: str) -> List[Message]:
+async def get_conversation_messages(db: AsyncSession, conversation_id: UUID) -> List[Message]:
     result = await db.execute(
         select(Message)
         .filter(Message.conversation_id == conversation_id)
@@ -68,18 +79,50 @@ async def get_conversation_messages(db: AsyncSession, conversation_id: str) -> L
     )
     return list(result.scalars().all())
 
-async def add_message(db: AsyncSession, conversation_id: str, role: str, content: str, metadata: dict = None) -> Message:
-    db_msg = Message(conversation_id=conversation_id, role=role, content=content, metadata_json=metadata)
-    db.add(db_msg)
+async def get_recent_messages(db: AsyncSession, conversation_id: UUID, limit: int) -> List[Message]:
+    """The last `limit` messages of a conversation, oldest first (served by ix_messages_conv_created)."""
+    result = await db.execute(
+        select(Message)
+        .filter(Message.conversation_id == conversation_id)
+        .order_by(desc(Message.created_at))
+        .limit(limit)
+    )
+    return list(reversed(result.scalars().all()))
+
+async def add_message(db: AsyncSession, conversation_id: UUID, role: str, content: str, metadata: dict = None) -> Message:
+    result = await db.execute(
+        insert(Message)
+        .values(conversation_id=conversation_id, role=role, content=content, metadata_json=metadata)
+        .returning(Message)
+    )
+    db_msg = result.scalar_one()
+    
+    # Touch the conversation updated_at (same transaction as the insert, timestamp set by Postgres)
+    await db.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(updated_at=func.now())
+    )
     
-    # Touch the conversation updated_at
-    conv_result = await db.execute(select(Conversation).filter(Conversation.id == conversation_id))
-    conv = conv_result.scalar_one_or_none()
-    if conv:
-        from datetime import datetime
-        import pytz
-        conv.updated_at = datetime.now(pytz.utc)
-        
     await db.commit()
-    await db.refresh(db_msg)
     return db_msg
+
+async def add_messages_bulk(db: AsyncSession, conversation_id: UUID, messages: List[Tuple[str, str, Optional[dict]]]) -> List[Message]:
+    """Insert several (role, content, metadata) messages with one multi-row INSERT."""
+    rows = [
+        # Rows of one INSERT share now(); offset them so created_at keeps their order
+        {"conversation_id": conversation_id, "role": role, "content": content, "metadata_json": metadata,
+         "created_at": func.now() + timedelta(microseconds=i)}
+        for i, (role, content, metadata) in enumerate(messages)
+    ]
+    result = await db.execute(insert(Message).values(rows).returning(Message))
+    db_msgs = list(result.scalars().all())
+    
+    await db.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        .values(updated_at=func.now())
+    )
+    
+    await db.commit()
+    return db_msgs
@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import NullPool
 import os
 from dotenv import load_dotenv
 
@@ -14,8 +15,45 @@ if DATABASE_URL.startswith("postgresql://"):
 elif DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
 
-engine = create_async_engine(DATABASE_URL, echo=False)
-AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# Connection pool sizing (per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 40))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 10))      # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 3600))    # seconds before a connection is replaced
+
+# Set when connecting through a transaction-mode PgBouncer (e.g. the Supabase pooler on port 6543).
+# PgBouncer already multiplexes server connections, so we skip the client-side pool.
+DB_USE_PGBOUNCER = os.getenv("DB_USE_PGBOUNCER") == "True"
+
+# Set in development/CI to make any implicit relationship lazy load raise instead of
+# silently issuing a query (catches N+1 patterns before they reach production).
+DB_RAISE_ON_LAZY_LOAD = os.getenv("DB_RAISE_ON_LAZY_LOAD") == "True"
+
+def make_engine():
+    """Create an engine with the configured pool settings.
+
+    asyncpg connections belong to the event loop that opened them, so code
+    running on a separate loop needs an engine (and pool) of its own.
+    """
+    if DB_USE_PGBOUNCER:
+        return create_async_engine(DATABASE_URL, echo=False, poolclass=NullPool)
+    return create_async_engine(
+        DATABASE_URL,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        # Our queries are small OLTP lookups; JIT compilation only adds warmup cost
+        connect_args={"server_settings": {"jit": "off"}},
+    )
+
+def make_session_factory(bind):
+    return async_sessionmaker(bind, class_=AsyncSession, expire_on_commit=False)
+
+engine = make_engine()
+AsyncSessionLocal = make_session_factory(engine)
 
 Base = declarative_base()
 
@@ -1,8 +1,12 @@
 from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Integer, Text, func, Index, JSON
 from sqlalchemy.orm import relationship
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import UUID
+from pgvector.sqlalchemy import HALFVEC
 import uuid
-from backend.db.database import Base
+from backend.db.database import Base, DB_RAISE_ON_LAZY_LOAD
+
+# Relationships must be loaded explicitly (selectinload) by the queries that need them
+RELATIONSHIP_LAZY = "raise_on_sql" if DB_RAISE_ON_LAZY_LOAD else "select"
 
 class User(Base):
     __tablename__ = "users"
@@ -11,52 +15,65 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    conversations = relationship("Conversation", back_populates="user", cascade="all, delete-orphan")
+    conversations = relationship(
+        "Conversation", back_populates="user", cascade="all, delete-orphan",
+        passive_deletes=True, lazy=RELATIONSHIP_LAZY
+    )
 
 
 class Conversation(Base):
     __tablename__ = "conversations"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String, default="New Chat")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
-    user = relationship("User", back_populates="conversations")
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan", order_by="Message.created_at")
+    user = relationship("User", back_populates="conversations", lazy=RELATIONSHIP_LAZY)
+    # passive_deletes lets ON DELETE CASCADE remove the messages instead of loading them first
+    messages = relationship(
+        "Message", back_populates="conversation", cascade="all, delete-orphan",
+        order_by="Message.created_at", passive_deletes=True, lazy=RELATIONSHIP_LAZY
+    )
 
 
 class Message(Base):
     __tablename__ = "messages"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    conversation_id = Column(String, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     role = Column(String, nullable=False) # 'user' or 'assistant'
     content = Column(Text, nullable=False)
     metadata_json = Column(JSON, nullable=True) # Stores debug info, tokens, latency, sources
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    conversation = relationship("Conversation", back_populates="messages")
+    conversation = relationship("Conversation", back_populates="messages", lazy=RELATIONSHIP_LAZY)
+
+    __table_args__ = (
+        # History is always read per conversation in created_at order
+        Index('ix_messages_conv_created', 'conversation_id', 'created_at'),
+    )
 
 
 class DocumentChunk(Base):
     __tablename__ = "document_chunks"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     document_name = Column(String, nullable=False, index=True)
     page = Column(Integer, nullable=False)
     text_content = Column(Text, nullable=False)
     
-    # 384 dimensions for sentence-transformers/all-MiniLM-L6-v2
-    embedding = Column(Vector(384), nullable=False)
+    # 384 dimensions for sentence-transformers/all-MiniLM-L6-v2, stored as
+    # fp16 (pgvector 0.7+) to halve the table and HNSW index size
+    embedding = Column(HALFVEC(384), nullable=False)
 
     __table_args__ = (
         Index(
             'hnsw_embedding_idx',
             'embedding',
             postgresql_using='hnsw',
-            postgresql_with={'m': 16, 'ef_construction': 64},
-            postgresql_ops={'embedding': 'vector_cosine_ops'}
+            postgresql_with={'m': 16, 'ef_construction': 200},
+            postgresql_ops={'embedding': 'halfvec_cosine_ops'}
         ),
     )
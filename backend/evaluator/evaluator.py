@@ -59,6 +59,22 @@ CONFLICT_PHRASES = [
     "note that there may be",
 ]
 
+# Transition words that, repeated across multi-document answers, hint at conflicts
+TRANSITION_WORDS = ["however", "but", "although", "whereas", "nevertheless"]
+
+# Each phrase list compiled into one alternation so an answer is scanned once
+# per list instead of once per phrase
+_REFUSAL_RE = re.compile("|".join(map(re.escape, REFUSAL_PHRASES)))
+_CONFLICT_RE = re.compile("|".join(map(re.escape, CONFLICT_PHRASES)))
+
+# Conflict phrases and transition words in a single pass. The lookahead reports a
+# match at every position (so overlapping words are not swallowed), and conflict
+# phrases are tried first when both start at the same offset.
+_CONFLICT_SCAN_RE = re.compile(
+    "(?=(?:(?P<conflict>" + "|".join(map(re.escape, CONFLICT_PHRASES)) + ")"
+    "|(?P<transition>" + "|".join(map(re.escape, TRANSITION_WORDS)) + ")))"
+)
+
 
 def evaluate_response(
     answer: str,
@@ -107,10 +123,7 @@ def evaluate_response(
 
 def _check_refusal(answer_lower: str) -> bool:
     """Check if the answer contains refusal phrases."""
-    for phrase in REFUSAL_PHRASES:
-        if phrase in answer_lower:
-            return True
-    return False
+    return _REFUSAL_RE.search(answer_lower) is not None
 
 
 def _check_conflicting_info(answer_lower: str, retrieved_chunks: List[Dict] = None) -> bool:
@@ -121,20 +134,24 @@ def _check_conflicting_info(answer_lower: str, retrieved_chunks: List[Dict] = No
     1. The answer text contains conflict-indicating phrases
     2. Retrieved chunks come from 3+ different documents on similar content
     """
-    # Check for conflict phrases in the answer
-    for phrase in CONFLICT_PHRASES:
-        if phrase in answer_lower:
-            return True
-    
     # Check if retrieved chunks span many different documents
+    spans_many_docs = False
     if retrieved_chunks and len(retrieved_chunks) >= 3:
         unique_docs = set(chunk.get("document", "") for chunk in retrieved_chunks)
-        if len(unique_docs) >= 3:
-            # Additional heuristic: if the answer is long and mentions "however" or "but"
-            transition_words = ["however", "but", "although", "whereas", "nevertheless"]
-            transition_count = sum(1 for w in transition_words if w in answer_lower)
-            if transition_count >= 2:
-                return True
+        spans_many_docs = len(unique_docs) >= 3
+    
+    if not spans_many_docs:
+        # Only the conflict phrases matter
+        return _CONFLICT_RE.search(answer_lower) is not None
+    
+    # Additional heuristic: if the answer mentions 2+ transition words ("however", "but", ...)
+    transitions_found = set()
+    for match in _CONFLICT_SCAN_RE.finditer(answer_lower):
+        if match.group("conflict"):
+            return True
+        transitions_found.add(match.group("transition"))
+        if len(transitions_found) >= 2:
+            return True
     
     return False
 
@@ -0,0 +1,49 @@
+"""
+Token Counting — Budget prompt text in tokens rather than characters.
+
+Uses tiktoken's cl100k_base encoding. Llama 3's tokenizer is built on the same
+BPE vocabulary (extended to 128k entries), so counts closely track what Groq
+bills for the Llama models we route to.
+"""
+
+import re
+from functools import lru_cache
+from typing import Tuple
+
+import tiktoken
+
+ENCODING_NAME = "cl100k_base"
+
+# Ends of sentences or lines, used to cut truncated text at a clean boundary
+_SENTENCE_END_RE = re.compile(r'[.!?\n]')
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding:
+    """Load the BPE encoding once (tiktoken downloads and caches it on first use)."""
+    return tiktoken.get_encoding(ENCODING_NAME)
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text."""
+    return len(get_encoding().encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
+    """
+    Keep the start of text within max_tokens, preferring to end on a sentence.
+
+    Returns (text, token_count); text is returned unchanged when it already fits.
+    """
+    encoding = get_encoding()
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text, len(tokens)
+
+    head = encoding.decode(tokens[:max_tokens])
+    # Back up to the last sentence end unless that would drop most of the text
+    boundaries = [m.end() for m in _SENTENCE_END_RE.finditer(head)]
+    if boundaries and boundaries[-1] > len(head) // 2:
+        head = head[:boundaries[-1]]
+    head = head.rstrip() + "..."
+    return head, len(encoding.encode(head))
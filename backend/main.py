@@ -5,28 +5,42 @@ Main entry point. Serves the POST /query endpoint and the frontend chat UI.
 Orchestrates: Router → Retriever → LLM → Evaluator → Response
 """
 
+import asyncio
+import hashlib
 import logging
-import json
 import os
 from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+from uuid import UUID
 
-from fastapi import FastAPI, HTTPException, Depends
+import orjson
+from cachetools import LRUCache
+
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.database import get_db, AsyncSessionLocal
-from backend.db.models import User
 from backend.db import crud
-from backend.auth.dependencies import get_current_user
+from backend.auth.dependencies import get_current_user, UserContext
 
-from backend.models.schemas import QueryRequest, QueryResponse, Metadata, Source, TokenUsage, ConversationUpdate
-from backend.router.classifier import classify_query, create_routing_log
+from backend.models.schemas import (
+    QueryRequest, QueryResponse, Metadata, Source, TokenUsage, ConversationUpdate,
+    ConversationSummary, HistoryMessage
+)
+from backend.router.classifier import classify_query, is_bare_greeting, create_routing_log
 from backend.rag.retriever import Retriever
+from backend.rag.semantic_cache import SemanticCache, history_hash
 from backend.llm.groq_client import get_groq_client
+from backend.llm.prompts import PROMPT_VERSION
+from backend.llm.tokens import get_encoding, count_tokens, truncate_to_tokens
 from backend.evaluator.evaluator import evaluate_response, get_warning_message
-from backend.config import PORT
+from backend.config import (
+    PORT, MODEL_SIMPLE, EMBEDDING_DIM, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_SIZE,
+    HISTORY_TOKEN_BUDGET, HISTORY_MESSAGE_TOKEN_LIMIT
+)
 
 # Configure logging
 logging.basicConfig(
@@ -38,6 +52,14 @@ logger = logging.getLogger(__name__)
 # Global instances (lazy initialized)
 retriever = None
 groq_client = None
+semantic_cache = SemanticCache(EMBEDDING_DIM, threshold=SEMANTIC_CACHE_THRESHOLD, maxsize=SEMANTIC_CACHE_SIZE)
+
+# Titles for previously seen opening questions, keyed on the normalized question
+TITLE_CACHE_SIZE = 2048
+_title_cache = LRUCache(maxsize=TITLE_CACHE_SIZE)
+
+# Generations currently running, keyed on question + history digest
+_in_flight: Dict[bytes, asyncio.Future] = {}
 
 
 @asynccontextmanager
@@ -61,8 +83,18 @@ async def lifespan(app):
         logger.error(f"Failed to initialize Groq client: {e}")
         raise
     
+    try:
+        # Load the tokenizer now so the first request doesn't pay for it
+        get_encoding()
+        logger.info("Tokenizer loaded successfully.")
+    except Exception as e:
+        logger.error(f"Failed to load tokenizer: {e}")
+        raise
+    
     logger.info("ClearPath RAG Chatbot ready!")
     yield
+    
+    await groq_client.aclose()
 
 
 app = FastAPI(
@@ -83,86 +115,178 @@ app.add_middleware(
 
 # --- Conversation History Helpers ---
 
-def generate_conversation_title(question: str) -> str:
-    """Generate a short title based on the user's first question using Groq."""
+async def _generate_title(question: str) -> str:
+    """Ask Groq for a title; raises on failure so the caller's fallback is never cached."""
     prompt = f"Write a short, concise 3 to 5 word title for a conversation that starts with this question:\n\n{question}\n\nDo not include quotes or extra text. Just the title."
+    result = await groq_client.generate(prompt, "", "llama-3.1-8b-instant")
+    if result.get("error"):
+        raise RuntimeError(result["answer"])
+    # Clear markdown bold asterisks and quotes
+    return result["answer"].replace('*', '').strip(' "''')
+
+
+def _title_key(question: str) -> str:
+    return " ".join(question.lower().split())[:200]
+
+
+def _fallback_title(question: str) -> str:
+    return question[:30] + "..." if len(question) > 30 else question
+
+
+async def generate_conversation_title(question: str) -> str:
+    """Generate a short title based on the user's first question using Groq."""
+    norm_q = _title_key(question)
     try:
         if groq_client:
-            result = groq_client.generate(prompt, "", "llama-3.1-8b-instant")
-            # Clear markdown bold asterisks and quotes
-            return result["answer"].replace('*', '').strip(' "''')
+            title = _title_cache.get(norm_q)
+            if title is None:
+                title = await _generate_title(question)
+                _title_cache[norm_q] = title
+            return title
     except Exception as e:
         logger.error(f"Title generation failed: {e}")
-    return question[:30] + "..." if len(question) > 30 else question
+    return _fallback_title(question)
 
 
-async def get_or_create_conversation(db: AsyncSession, user: User, conversation_id: str = None, question: str = None):
-    if conversation_id:
-        conv = await crud.get_conversation(db, conversation_id, user.id)
-        if not conv:
-            raise HTTPException(status_code=403, detail="Conversation not found or access denied.")
-        return conv
-        
-    title = generate_conversation_title(question) if question else "New Chat"
-    return await crud.create_conversation(db, user.id, title=title)
+def route_query(question: str):
+    """Return (routing, is_greeting); bare greetings skip the rule-based classifier."""
+    if is_bare_greeting(question):
+        return {"classification": "simple", "model_used": MODEL_SIMPLE, "signals": ["greeting_detected"]}, True
+
+    routing = classify_query(question)
+    is_greeting = ("greeting_detected" in routing.get("signals", []) and len(question.split()) <= 5)
+    return routing, is_greeting
+
 
+async def prepare_turn(db: AsyncSession, user: UserContext, conversation_id: UUID, question: str,
+                       is_greeting: bool, query_embedding: List[float] = None, use_cache: bool = False):
+    """
+    Resolve the conversation, its recent history and the retrieved chunks for a turn.
 
-async def get_formatted_history(db: AsyncSession, conversation_id: str, max_turns: int = 5):
+    Returns (conv, history, retrieved_chunks, cached). With use_cache, the
+    semantic cache is checked as soon as the history is known; on a hit,
+    `cached` is the stored response and no retrieval or title LLM call is made.
+
+    Retrieval runs on its own session, so it overlaps the title generation (new
+    conversation) or the history fetch (existing one; cancelled on a cache hit).
+    The request session can't be shared between concurrent tasks, so the steps
+    that use `db` stay in order.
+    """
+    def start_retrieval():
+        if is_greeting:
+            return None
+        return asyncio.create_task(retriever.retrieve_async(question, query_embedding=query_embedding))
+
+    def lookup(history):
+        return semantic_cache.lookup(query_embedding, history_hash(history)) if use_cache else None
+
+    retrieve_task = None
+    try:
+        if conversation_id:
+            retrieve_task = start_retrieval()
+            conv = await crud.get_conversation(db, conversation_id, user.id)
+            if not conv:
+                raise HTTPException(status_code=403, detail="Conversation not found or access denied.")
+            history = await get_formatted_history(db, conv.id)
+            cached = lookup(history)
+            if cached is not None:
+                if retrieve_task:
+                    retrieve_task.cancel()
+                return conv, history, [], cached
+        else:
+            history = []
+            cached = lookup(history)
+            if cached is not None:
+                # Reuse a title already generated for this question, else skip the LLM call
+                title = _title_cache.get(_title_key(question)) or _fallback_title(question)
+                conv = await crud.create_conversation(db, user.id, title=title)
+                return conv, history, [], cached
+            retrieve_task = start_retrieval()
+            title = await generate_conversation_title(question)
+            conv = await crud.create_conversation(db, user.id, title=title)
+        retrieved_chunks = await retrieve_task if retrieve_task else []
+    except BaseException:
+        if retrieve_task:
+            retrieve_task.cancel()
+        raise
+
+    return conv, history, retrieved_chunks, None
+
+
+async def get_formatted_history(db: AsyncSession, conversation_id: UUID, max_turns: int = 5):
     """Fetch history from DB and format for Groq LLM (list of dicts)."""
-    messages = await crud.get_conversation_messages(db, conversation_id)
-    # Get last N messages based on turns (each turn = 2 messages: user + assistant)
-    recent_messages = messages[-(max_turns * 2):] if len(messages) > max_turns * 2 else messages
+    # Only the last N turns are needed (each turn = 2 messages: user + assistant)
+    recent_messages = await crud.get_recent_messages(db, conversation_id, limit=max_turns * 2)
     
+    # Walk newest → oldest so the most recent turns win the token budget
     history = []
-    for msg in recent_messages:
-        # We truncated assistant answers to 200 chars in memory before, do same here for context
-        content = msg.content
-        if msg.role == "assistant" and len(content) > 500:
-            content = content[:500] + "..."
+    budget = HISTORY_TOKEN_BUDGET
+    for msg in reversed(recent_messages):
+        # Long assistant answers are cut down so one reply can't crowd out the rest
+        if msg.role == "assistant":
+            content, n_tokens = truncate_to_tokens(msg.content, HISTORY_MESSAGE_TOKEN_LIMIT)
+        else:
+            content, n_tokens = msg.content, count_tokens(msg.content)
+        # A message that doesn't fit keeps its start rather than being dropped,
+        # so one long message can't wipe out all the recent context
+        if n_tokens > budget:
+            content, n_tokens = truncate_to_tokens(content, budget)
+        budget -= n_tokens
             
         history.append({
             "role": msg.role,
             "content": content
         })
+        if budget <= 0:
+            break
+    history.reverse()
     return history
 
 
-# --- Main Endpoints ---
+async def _persist_turn(conversation_id: UUID, messages: List[tuple]):
+    """
+    Save a finished turn after the response has been sent.
 
-@app.post("/query", response_model=QueryResponse)
-async def query(
-    request: QueryRequest,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """Main chatbot endpoint."""
-    if not request.question or not request.question.strip():
-        raise HTTPException(status_code=400, detail="Question cannot be empty")
-    
-    question = request.question.strip()
-    
-    # Get or create DB Conversation
-    conv = await get_or_create_conversation(db, current_user, request.conversation_id, question=question)
-    
-    routing = classify_query(question)
-    classification = routing["classification"]
-    model_used = routing["model_used"]
-    
-    is_greeting = ("greeting_detected" in routing.get("signals", []) and len(question.split()) <= 5)
-    
-    history = await get_formatted_history(db, conv.id)
-    
+    Runs as a background task on its own session, so a crash between sending the
+    response and this commit loses that one turn from the stored history.
+    """
+    async with AsyncSessionLocal() as persist_db:
+        await crud.add_messages_bulk(persist_db, conversation_id, messages)
+
+
+def _sse(event: dict) -> bytes:
+    """Encode one Server-Sent Events frame; StreamingResponse sends bytes as-is."""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+async def _single_flight(key: bytes, factory):
+    """
+    Run factory() once per key at a time; concurrent callers with the same key
+    await the same task and share its result.
+
+    The task is shielded so a caller that disconnects doesn't cancel the work
+    for everyone else waiting on it.
+    """
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _answer_query(question: str, classification: str, model_used: str, is_greeting: bool,
+                        history: List[dict], retrieved_chunks: List[dict], query_embedding, history_digest: bytes):
+    """Generate and evaluate an answer; returns the response (without conversation_id) and message metadata."""
     if is_greeting:
-        retrieved_chunks = []
         chunks_retrieved = 0
         context = "The user is greeting you. Respond warmly."
-        llm_result = groq_client.generate(question, context, model_used, conversation_history=history)
+        llm_result = await groq_client.generate(question, context, model_used, conversation_history=history)
         evaluator_flags = []
     else:
-        retrieved_chunks = await retriever.retrieve_async(question)
         chunks_retrieved = len(retrieved_chunks)
         context = retriever.build_context(retrieved_chunks)
-        llm_result = groq_client.generate(question, context, model_used, conversation_history=history)
+        llm_result = await groq_client.generate(question, context, model_used, conversation_history=history)
         evaluator_flags = evaluate_response(llm_result["answer"], chunks_retrieved, retrieved_chunks)
     
     answer = llm_result["answer"]
@@ -173,6 +297,7 @@ async def query(
     
     msg_metadata = {
         "model_used": model_used,
+        "prompt_version": PROMPT_VERSION,
         "classification": classification,
         "tokens": {"input": llm_result["tokens_input"], "output": llm_result["tokens_output"]},
         "latency_ms": llm_result["latency_ms"],
@@ -181,31 +306,86 @@ async def query(
         "sources": [{"document": c["document"], "page": c["page"], "relevance_score": c.get("relevance_score")} for c in retrieved_chunks]
     }
     
-    # Save the new turn to the DB
-    await crud.add_message(db, conv.id, "user", question)
-    await crud.add_message(db, conv.id, "assistant", answer, metadata=msg_metadata)
-    
-    sources = [Source(document=c["document"], page=c["page"], relevance_score=c.get("relevance_score")) for c in retrieved_chunks]
+    # Every field below is built server-side with known types, so skip re-validating it
+    sources = [Source.model_construct(document=c["document"], page=c["page"], relevance_score=c.get("relevance_score")) for c in retrieved_chunks]
     
-    return QueryResponse(
+    response = QueryResponse.model_construct(
         answer=answer,
-        metadata=Metadata(
+        metadata=Metadata.model_construct(
             model_used=model_used,
             classification=classification,
-            tokens=TokenUsage(input=llm_result["tokens_input"], output=llm_result["tokens_output"]),
+            tokens=TokenUsage.model_construct(input=llm_result["tokens_input"], output=llm_result["tokens_output"]),
             latency_ms=llm_result["latency_ms"],
             chunks_retrieved=chunks_retrieved,
             evaluator_flags=evaluator_flags
         ),
         sources=sources,
-        conversation_id=conv.id
+        conversation_id=None
     )
+    # Failed generations are not worth repeating to the next asker
+    if not llm_result.get("error"):
+        semantic_cache.insert(query_embedding, question, response, history_digest)
+    return response, msg_metadata
+
+
+# --- Main Endpoints ---
+
+@app.post("/query", response_model=QueryResponse)
+async def query(
+    request: QueryRequest,
+    background_tasks: BackgroundTasks,
+    current_user: UserContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Main chatbot endpoint."""
+    if not request.question or not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    question = request.question.strip()
+    
+    routing, is_greeting = route_query(question)
+    classification = routing["classification"]
+    model_used = routing["model_used"]
+    
+    query_embedding = await retriever.embed_query_async(question)
+    # Near-duplicate question with the same history: prepare_turn returns the
+    # earlier answer before any retrieval or title generation is awaited
+    conv, history, retrieved_chunks, cached = await prepare_turn(
+        db, current_user, request.conversation_id, question, is_greeting,
+        query_embedding=query_embedding, use_cache=True
+    )
+    if cached is not None:
+        msg_metadata = {
+            **cached.metadata.model_dump(),
+            "prompt_version": PROMPT_VERSION,
+            "sources": [s.model_dump() for s in cached.sources],
+            "cache_hit": True
+        }
+        background_tasks.add_task(_persist_turn, conv.id, [
+            ("user", question, None),
+            ("assistant", cached.answer, msg_metadata),
+        ])
+        return cached.model_copy(update={"conversation_id": conv.id})
+    
+    # Identical questions arriving together (same history) share one generation
+    history_digest = history_hash(history)
+    flight_key = hashlib.blake2b(question.encode() + history_digest, digest_size=16).digest()
+    response, msg_metadata = await _single_flight(flight_key, lambda: _answer_query(
+        question, classification, model_used, is_greeting, history, retrieved_chunks, query_embedding, history_digest
+    ))
+    
+    # Save the new turn to the DB once the response is on its way
+    background_tasks.add_task(_persist_turn, conv.id, [
+        ("user", question, None),
+        ("assistant", response.answer, msg_metadata),
+    ])
+    return response.model_copy(update={"conversation_id": conv.id})
 
 
 @app.post("/query/stream")
 async def query_stream(
     request: QueryRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserContext = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Streaming endpoint — returns tokens via Server-Sent Events (SSE)."""
@@ -214,46 +394,43 @@ async def query_stream(
     
     question = request.question.strip()
     
-    conv = await get_or_create_conversation(db, current_user, request.conversation_id, question=question)
-    
-    routing = classify_query(question)
+    routing, is_greeting = route_query(question)
     classification = routing["classification"]
     model_used = routing["model_used"]
     
-    is_greeting = ("greeting_detected" in routing.get("signals", []) and len(question.split()) <= 5)
-    
-    history = await get_formatted_history(db, conv.id)
+    conv, history, retrieved_chunks, _ = await prepare_turn(db, current_user, request.conversation_id, question, is_greeting)
     
     if is_greeting:
-        retrieved_chunks = []
         context = "The user is greeting you. Respond warmly."
     else:
-        retrieved_chunks = await retriever.retrieve_async(question)
         context = retriever.build_context(retrieved_chunks)
     
     sources = [{"document": c["document"], "page": c["page"], "relevance_score": c.get("relevance_score")} for c in retrieved_chunks]
     
-    async def event_generator():
+    # Everything in the metadata frame is known now, so encode it before streaming starts
+    meta_frame = _sse({
+        "type": "metadata",
+        "classification": classification,
+        "model_used": model_used,
+        "chunks_retrieved": len(retrieved_chunks),
+        "sources": sources,
+        "conversation_id": str(conv.id)
+    })
+    
+    async def event_generator() -> AsyncIterator[bytes]:
         full_answer = ""
-        meta_event = {
-            "type": "metadata",
-            "classification": classification,
-            "model_used": model_used,
-            "chunks_retrieved": len(retrieved_chunks),
-            "sources": sources,
-            "conversation_id": conv.id
-        }
-        yield f"data: {json.dumps(meta_event)}\n\n"
+        yield meta_frame
         
-        for chunk in groq_client.generate_stream(question, context, model_used, conversation_history=history):
+        async for chunk in groq_client.generate_stream(question, context, model_used, conversation_history=history):
             if chunk["type"] == "token":
                 full_answer += chunk["content"]
-                yield f"data: {json.dumps(chunk)}\n\n"
+                yield _sse(chunk)
             elif chunk["type"] == "done":
                 flags = [] if is_greeting else evaluate_response(full_answer, len(retrieved_chunks), retrieved_chunks)
                 
                 msg_metadata = {
                     "model_used": model_used,
+                    "prompt_version": PROMPT_VERSION,
                     "classification": classification,
                     "tokens": {
                         "input": chunk["tokens_input"],
@@ -266,9 +443,10 @@ async def query_stream(
                 }
                 # Save to DB inside the generator using its own session context
                 async with AsyncSessionLocal() as stream_db:
-                    await crud.add_message(stream_db, conv.id, "user", question)
-                    await crud.add_message(stream_db, conv.id, "assistant", full_answer, metadata=msg_metadata)
-                    await stream_db.commit()
+                    await crud.add_messages_bulk(stream_db, conv.id, [
+                        ("user", question, None),
+                        ("assistant", full_answer, msg_metadata),
+                    ])
                 
                 done_event = {
                     "type": "done",
@@ -277,42 +455,81 @@ async def query_stream(
                     "latency_ms": chunk["latency_ms"],
                     "evaluator_flags": flags
                 }
-                yield f"data: {json.dumps(done_event)}\n\n"
+                yield _sse(done_event)
             elif chunk["type"] == "error":
-                yield f"data: {json.dumps(chunk)}\n\n"
+                yield _sse(chunk)
     
     return StreamingResponse(event_generator(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 # --- Config Endpoint ---
 
+# Public Firebase web config; fixed for the life of the process
+_FIREBASE_CONFIG = {
+    "apiKey": os.getenv("FIREBASE_API_KEY"),
+    "authDomain": os.getenv("FIREBASE_AUTH_DOMAIN"),
+    "projectId": os.getenv("FIREBASE_PROJECT_ID"),
+    "storageBucket": os.getenv("FIREBASE_STORAGE_BUCKET"),
+    "messagingSenderId": os.getenv("FIREBASE_MESSAGING_SENDER_ID"),
+    "appId": os.getenv("FIREBASE_APP_ID"),
+    "measurementId": os.getenv("FIREBASE_MEASUREMENT_ID")
+}
+
+
 @app.get("/api/firebase-config")
 async def get_firebase_config():
     """Return public Firebase variables from the .env so they aren't hardcoded in JS."""
-    return {
-        "apiKey": os.getenv("FIREBASE_API_KEY"),
-        "authDomain": os.getenv("FIREBASE_AUTH_DOMAIN"),
-        "projectId": os.getenv("FIREBASE_PROJECT_ID"),
-        "storageBucket": os.getenv("FIREBASE_STORAGE_BUCKET"),
-        "messagingSenderId": os.getenv("FIREBASE_MESSAGING_SENDER_ID"),
-        "appId": os.getenv("FIREBASE_APP_ID"),
-        "measurementId": os.getenv("FIREBASE_MEASUREMENT_ID")
-    }
+    return JSONResponse(_FIREBASE_CONFIG, headers={"Cache-Control": "public, max-age=3600"})
 
 
 # --- CRUD Endpoints for UI ---
 
-@app.get("/conversations")
-async def list_conversations(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    RFC 9110 If-None-Match check: "*" matches any current representation, and
+    otherwise each listed entity-tag is compared weakly (W/ prefix ignored).
+    """
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+# Declared response models let FastAPI serialize these lists straight to JSON bytes
+@app.get("/conversations", response_model=List[ConversationSummary])
+async def list_conversations(
+    request: Request,
+    response: Response,
+    current_user: UserContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     """List all conversations for the authenticated user."""
     convs = await crud.get_user_conversations(db, current_user.id)
+    
+    # Creating, renaming (bumps updated_at) or deleting a conversation changes the tag,
+    # so an unchanged sidebar revalidates with a bodiless 304
+    digest = hashlib.blake2b(current_user.id.encode(), digest_size=8)
+    for c in convs:
+        digest.update(f"{c.id}:{c.updated_at}".encode())
+    etag = f'"{digest.hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, must-revalidate"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
     return [{"id": c.id, "title": c.title, "updated_at": c.updated_at} for c in convs]
 
 
-@app.get("/conversations/{conversation_id}")
+@app.get("/conversations/{conversation_id}", response_model=List[HistoryMessage])
 async def get_conversation_history_api(
-    conversation_id: str, 
-    current_user: User = Depends(get_current_user), 
+    conversation_id: UUID, 
+    current_user: UserContext = Depends(get_current_user), 
     db: AsyncSession = Depends(get_db)
 ):
     """Get full message history for a specific conversation."""
@@ -326,9 +543,9 @@ async def get_conversation_history_api(
 
 @app.put("/conversations/{conversation_id}")
 async def rename_conversation_api(
-    conversation_id: str,
+    conversation_id: UUID,
     update_data: ConversationUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserContext = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Rename a conversation."""
@@ -343,8 +560,8 @@ async def rename_conversation_api(
 
 @app.delete("/conversations/{conversation_id}")
 async def delete_conversation_api(
-    conversation_id: str, 
-    current_user: User = Depends(get_current_user), 
+    conversation_id: UUID, 
+    current_user: UserContext = Depends(get_current_user), 
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a conversation."""
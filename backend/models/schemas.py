@@ -2,20 +2,37 @@
 Pydantic schemas — Request and response models matching the API contract.
 """
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 from pydantic import BaseModel, ConfigDict
 
 
 class QueryRequest(BaseModel):
     """Request body for POST /query."""
     question: str
-    conversation_id: Optional[str] = None
+    conversation_id: Optional[UUID] = None
 
 
 class ConversationUpdate(BaseModel):
     """Request body to rename a conversation."""
     title: str
 
+
+class ConversationSummary(BaseModel):
+    """One entry of GET /conversations."""
+    id: UUID
+    title: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+
+class HistoryMessage(BaseModel):
+    """One message of GET /conversations/{id}."""
+    role: str
+    content: str
+    created_at: Optional[datetime] = None
+    metadata: Optional[Dict[str, Any]] = None
+
 class TokenUsage(BaseModel):
     """Token usage breakdown."""
     input: int
@@ -45,4 +62,4 @@ class QueryResponse(BaseModel):
     answer: str
     metadata: Metadata
     sources: List[Source]
-    conversation_id: str
+    conversation_id: UUID
@@ -10,8 +10,12 @@ Strategy: Recursive character-based splitting.
 
 import json
 import os
+import re
 from typing import List, Dict
 
+# Whitespace following a sentence ending
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
 
 def chunk_text(text: str, chunk_size: int = 500, chunk_overlap: int = 100) -> List[str]:
     """
@@ -63,8 +67,7 @@ def chunk_text(text: str, chunk_size: int = 500, chunk_overlap: int = 100) -> Li
 def _split_on_sentences(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
     """Split text on sentence boundaries when paragraphs are too long."""
     # Split on common sentence endings
-    import re
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
     
     chunks = []
     current_chunk = ""
@@ -1,34 +1,49 @@
 from typing import List, Dict
+import csv
+import io
 import numpy as np
 import logging
+import threading
+import uuid
 from fastembed import TextEmbedding
 from sqlalchemy.future import select
 from sqlalchemy import text
 from backend.db.database import AsyncSessionLocal
 from backend.db.models import DocumentChunk
-from backend.config import EMBEDDING_MODEL
+from backend.config import EMBEDDING_MODEL, EMBEDDING_CACHE_DIR
 
 logger = logging.getLogger(__name__)
 
+# One ONNX session per process, shared by the retriever and ingestion
+_embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+def get_embedding_model() -> TextEmbedding:
+    """Load the fastembed model on first use and return the shared instance."""
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                logger.info(f"Loading fastembed model: {EMBEDDING_MODEL}...")
+                _embedding_model = TextEmbedding(model_name=EMBEDDING_MODEL, cache_dir=EMBEDDING_CACHE_DIR)
+                logger.info("Embedding model loaded.")
+    return _embedding_model
+
 class EmbeddingService:
     """Manages document chunking, embedding generation and inserting to DB."""
     
     def __init__(self, model_name: str = None):
         """Initialize the embedding model."""
-        # FastEmbed uses a slightly different default model name string
-        model_name = "sentence-transformers/all-MiniLM-L6-v2"
-        logger.info(f"Loading fastembed model: {model_name}...")
-        self.model = TextEmbedding(model_name=model_name)
-        logger.info("Embedding model loaded.")
+        self.model = get_embedding_model()
         
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Generate normalized vector embeddings for a list of strings."""
         logger.info(f"Generating embeddings for {len(texts)} chunks...")
-        # fastembed returns a generator of numpy arrays
-        embeddings = list(self.model.embed(texts))
-        
-        # Convert numpy floats to standard python floats for pgvector
-        embeddings_list = [emb.tolist() for emb in embeddings]
+        # fastembed returns a generator of numpy arrays; convert each row as it
+        # arrives rather than holding every fp32 row alongside the output.
+        # Round to fp16 to match the halfvec column, then convert to
+        # standard python floats for pgvector
+        embeddings_list = [emb.astype(np.float16).tolist() for emb in self.model.embed(texts)]
         return embeddings_list
 
     async def insert_chunks_to_db(self, chunks: List[Dict]):
@@ -45,22 +60,36 @@ class EmbeddingService:
         texts = [chunk["text"] for chunk in chunks]
         embeddings = self.generate_embeddings(texts)
         
-        chunk_objects = []
-        for i, chunk in enumerate(chunks):
-            chunk_obj = DocumentChunk(
-                document_name=chunk["document"],
-                page=chunk["page"],
-                text_content=chunk["text"],
-                embedding=embeddings[i]
-            )
-            chunk_objects.append(chunk_obj)
-            
+        # Bulk load with COPY ... FORMAT csv rather than one INSERT per ORM
+        # object; halfvec parses its '[a,b,...]' text form on the server
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for chunk, embedding in zip(chunks, embeddings):
+            writer.writerow([
+                uuid.uuid4(),
+                chunk["document"],
+                chunk["page"],
+                chunk["text"],
+                "[" + ",".join(map(str, embedding)) + "]",
+            ])
+        
         async with AsyncSessionLocal() as db:
-            logger.info(f"Saving {len(chunk_objects)} chunks to database...")
+            logger.info(f"Saving {len(chunks)} chunks to database...")
             # Optionally delete prior chunks for the same docs to avoid duplicates
             # In a real app we'd do UPSERTs, but append is fine for this demo.
-            db.add_all(chunk_objects)
-            await db.commit()
+            connection = await db.connection()
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            # The COPY goes straight to asyncpg, and SQLAlchemy's asyncpg adapter only
+            # opens its transaction on the first statement it runs itself, so the load
+            # gets an explicit transaction: all rows commit together or none do
+            async with driver_connection.transaction():
+                await driver_connection.copy_to_table(
+                    DocumentChunk.__tablename__,
+                    source=io.BytesIO(buffer.getvalue().encode("utf-8")),
+                    columns=["id", "document_name", "page", "text_content", "embedding"],
+                    format="csv",
+                )
             logger.info("Chunks successfully saved to PostgreSQL + pgvector.")
 
 # Optional: Keep a script entry point to easily index files from CLI
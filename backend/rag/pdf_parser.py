@@ -4,8 +4,9 @@ Preserves page numbers and document filenames for source tracking.
 """
 
 import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict
-from PyPDF2 import PdfReader
+import pypdfium2 as pdfium
 
 
 def extract_text_from_pdf(pdf_path: str) -> List[Dict]:
@@ -19,15 +20,24 @@ def extract_text_from_pdf(pdf_path: str) -> List[Dict]:
     pages = []
     
     try:
-        reader = PdfReader(pdf_path)
-        for i, page in enumerate(reader.pages):
-            text = page.extract_text()
-            if text and text.strip():
-                pages.append({
-                    "text": text.strip(),
-                    "page": i + 1,
-                    "document": filename
-                })
+        # PDFium does the text extraction in C++, several times faster than a
+        # pure-Python parser
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            for i, page in enumerate(pdf):
+                textpage = page.get_textpage()
+                # PDFium separates lines with \r\n; the chunker splits on \n
+                text = textpage.get_text_range().replace("\r\n", "\n")
+                textpage.close()
+                page.close()
+                if text and text.strip():
+                    pages.append({
+                        "text": text.strip(),
+                        "page": i + 1,
+                        "document": filename
+                    })
+        finally:
+            pdf.close()
     except Exception as e:
         print(f"Error reading {filename}: {e}")
     
@@ -39,6 +49,8 @@ def extract_all_pdfs(docs_dir: str) -> List[Dict]:
     Extract text from all PDFs in the given directory.
     
     Returns a flat list of page dicts from all documents.
+    Files are parsed in parallel worker processes (PDFium is not thread-safe,
+    and extraction is CPU-bound), then collected in filename order.
     """
     all_pages = []
     
@@ -49,11 +61,13 @@ def extract_all_pdfs(docs_dir: str) -> List[Dict]:
     
     print(f"Found {len(pdf_files)} PDF files in {docs_dir}")
     
-    for pdf_file in pdf_files:
-        pdf_path = os.path.join(docs_dir, pdf_file)
-        pages = extract_text_from_pdf(pdf_path)
-        all_pages.extend(pages)
-        print(f"  ✓ {pdf_file}: {len(pages)} pages extracted")
+    pdf_paths = [os.path.join(docs_dir, f) for f in pdf_files]
+    workers = max(1, min(len(pdf_paths), os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(extract_text_from_pdf, pdf_paths)
+        for pdf_file, pages in zip(pdf_files, results):
+            all_pages.extend(pages)
+            print(f"  ✓ {pdf_file}: {len(pages)} pages extracted")
     
     print(f"\nTotal: {len(all_pages)} pages extracted from {len(pdf_files)} PDFs")
     return all_pages
@@ -1,31 +1,157 @@
+import asyncio
 import logging
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional
+import numpy as np
+from cachetools import LRUCache
 from sqlalchemy.future import select
-from sqlalchemy import text
-from fastembed import TextEmbedding
+from sqlalchemy import text, literal, union_all
 
-from backend.db.database import AsyncSessionLocal
+from backend.db.database import AsyncSessionLocal, make_engine, make_session_factory
 from backend.db.models import DocumentChunk
-from backend.config import TOP_K, SIMILARITY_THRESHOLD, EMBEDDING_MODEL
+from backend.config import TOP_K, SIMILARITY_THRESHOLD, EMBEDDING_MODEL, HNSW_EF_SEARCH
+from backend.rag.embeddings import get_embedding_model
 
 logger = logging.getLogger(__name__)
 
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+
+# Queries embedded through embed_query_async within this window of each other
+# share one batched model call (run off the event loop)
+EMBED_BATCH_WINDOW = 0.005  # seconds
+EMBED_MAX_BATCH = 32
+
+# Normalized query -> float32 bytes, so cached values stay immutable. Guarded
+# by a lock because the sync path may run on worker threads.
+_query_embedding_cache = LRUCache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+_query_embedding_lock = threading.Lock()
+
+def _normalize_query(query: str) -> str:
+    # all-MiniLM-L6-v2 has an uncased tokenizer, so lowercasing doesn't change the vector
+    return " ".join(query.lower().split())
+
+def _cached_embedding(norm_query: str) -> Optional[bytes]:
+    with _query_embedding_lock:
+        return _query_embedding_cache.get(norm_query)
+
+def _cache_embedding(norm_query: str, embedding: bytes):
+    with _query_embedding_lock:
+        _query_embedding_cache[norm_query] = embedding
+
+def _embed_to_bytes(model, norm_queries: List[str]) -> List[bytes]:
+    # fastembed already yields float32 rows; copy=False skips a second buffer
+    return [emb.astype(np.float32, copy=False).tobytes() for emb in model.embed(norm_queries, batch_size=EMBED_MAX_BATCH)]
+
+# Event loop for the synchronous retrieve() bridge, started on first use. It
+# runs forever on a daemon thread with its own engine, so the connection pool
+# stays warm between calls instead of being rebuilt by asyncio.run() each time.
+_bridge_loop: Optional[asyncio.AbstractEventLoop] = None
+_bridge_sessions = None
+_bridge_lock = threading.Lock()
+
+def _get_bridge_loop() -> asyncio.AbstractEventLoop:
+    global _bridge_loop, _bridge_sessions
+    if _bridge_loop is None:
+        with _bridge_lock:
+            if _bridge_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="retriever-bridge", daemon=True).start()
+                _bridge_sessions = make_session_factory(make_engine())
+                _bridge_loop = loop
+    return _bridge_loop
+
 class Retriever:
     """Retrieves relevant document chunks from PostgreSQL using pgvector."""
     
     def __init__(self, model_name: str = None):
-        """Initialize retriever with the fastembed model."""
-        model_name = "sentence-transformers/all-MiniLM-L6-v2"
-        logger.info(f"Retriever loading fastembed model: {model_name}...")
-        self.model = TextEmbedding(model_name=model_name)
+        """Initialize retriever with the shared fastembed model."""
+        self.model = get_embedding_model()
+        # Per event loop: normalized query -> future for queries waiting on the
+        # next batch, and the timer that flushes it. Kept per loop because the
+        # retrieve() bridge runs on its own loop thread, and futures and timer
+        # handles may only be touched from the thread of the loop that owns them.
+        self._pending_embeddings: Dict[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]] = {}
+        self._flush_handles: Dict[asyncio.AbstractEventLoop, asyncio.TimerHandle] = {}
     
     def embed_query(self, query: str) -> List[float]:
-        """Embed a query string into a vector."""
-        # fastembed returns a generator, so we wrap in list
-        embedding = list(self.model.embed([query]))
-        return embedding[0].tolist()
+        """Embed a query string into a vector, reusing the result for repeated questions."""
+        norm_query = _normalize_query(query)
+        embedding = _cached_embedding(norm_query)
+        if embedding is None:
+            embedding = _embed_to_bytes(self.model, [norm_query])[0]
+            _cache_embedding(norm_query, embedding)
+        return np.frombuffer(embedding, dtype=np.float32).tolist()
+    
+    def cache_query_embedding(self, query: str, embedding):
+        """Seed the query-embedding cache, e.g. with vectors persisted by an earlier run."""
+        _cache_embedding(_normalize_query(query), np.asarray(embedding, dtype=np.float32).tobytes())
+    
+    async def embed_query_async(self, query: str) -> List[float]:
+        """
+        Embed a query without blocking the event loop.
         
-    async def retrieve_async(self, query: str, top_k: int = None, threshold: float = None) -> List[Dict]:
+        Cache misses are coalesced: queries arriving within EMBED_BATCH_WINDOW
+        (up to EMBED_MAX_BATCH of them, identical ones counted once) are
+        embedded together in a thread-pool call, so concurrent requests share
+        one ONNX run instead of queueing single-row ones on the loop.
+        """
+        norm_query = _normalize_query(query)
+        embedding = _cached_embedding(norm_query)
+        if embedding is None:
+            loop = asyncio.get_running_loop()
+            pending = self._pending_embeddings.setdefault(loop, {})
+            future = pending.get(norm_query)
+            if future is None:
+                future = loop.create_future()
+                pending[norm_query] = future
+                if len(pending) >= EMBED_MAX_BATCH:
+                    self._flush_embeddings(loop)
+                elif loop not in self._flush_handles:
+                    self._flush_handles[loop] = loop.call_later(EMBED_BATCH_WINDOW, self._flush_embeddings, loop)
+            # Shielded so one cancelled caller doesn't cancel the result for the others
+            embedding = await asyncio.shield(future)
+        return np.frombuffer(embedding, dtype=np.float32).tolist()
+    
+    def _flush_embeddings(self, loop: asyncio.AbstractEventLoop):
+        """Send every query pending on this loop to the model as one batch (runs on that loop)."""
+        handle = self._flush_handles.pop(loop, None)
+        if handle is not None:
+            handle.cancel()
+        batch = self._pending_embeddings.pop(loop, None)
+        if not batch:
+            return
+        
+        # The executor future resolves on `loop`, so resolve() runs on its thread
+        work = loop.run_in_executor(None, _embed_to_bytes, self.model, list(batch))
+        
+        def resolve(done: asyncio.Future):
+            error = None if done.cancelled() else done.exception()
+            if done.cancelled() or error is not None:
+                for future in batch.values():
+                    if not future.done():
+                        future.set_exception(error or asyncio.CancelledError())
+                return
+            for (norm_query, future), embedding in zip(batch.items(), done.result()):
+                _cache_embedding(norm_query, embedding)
+                if not future.done():
+                    future.set_result(embedding)
+        
+        work.add_done_callback(resolve)
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed several query strings, running every cache miss in one batched model call."""
+        norm_queries = [_normalize_query(q) for q in queries]
+        embeddings = {q: _cached_embedding(q) for q in norm_queries}
+        misses = [q for q, emb in embeddings.items() if emb is None]
+        if misses:
+            for norm_query, embedding in zip(misses, _embed_to_bytes(self.model, misses)):
+                _cache_embedding(norm_query, embedding)
+                embeddings[norm_query] = embedding
+        return [np.frombuffer(embeddings[q], dtype=np.float32).tolist() for q in norm_queries]
+        
+    async def retrieve_async(self, query: str, top_k: int = None, threshold: float = None,
+                             query_embedding: Optional[List[float]] = None,
+                             session_factory=None) -> List[Dict]:
         """
         Asynchronously retrieve the most relevant chunks.
         
@@ -33,26 +159,46 @@ class Retriever:
         Because distance = 1 - similarity, inner product distance works where lower is more similar.
         For pgvector inner product (<#>), lower distance means higher similarity.
         We want to return chunks where similarity >= threshold.
+
+        Pass query_embedding when the caller has already embedded the query.
+        session_factory overrides AsyncSessionLocal for callers on another event loop.
         """
         top_k = top_k or TOP_K
         threshold = threshold or SIMILARITY_THRESHOLD
+        session_factory = session_factory or AsyncSessionLocal
         
-        query_embedding = self.embed_query(query)
+        if query_embedding is None:
+            query_embedding = await self.embed_query_async(query)
         
         relevant_chunks = []
-        async with AsyncSessionLocal() as db:
+        async with session_factory() as db:
             # For cosine similarity in pgvector, `<=>` returns the cosine distance (1 - cosine_similarity).
-            # So if we want similarity >= 0.3, it means distance <= 0.7
+            # So if we want similarity >= 0.3, it means distance <= 0.7, filtered in SQL so
+            # rows below the threshold never leave the server. The filter only
+            # drops the farthest rows, so the result matches LIMIT-then-filter.
             
-            # Using SQLAlchemy pgvector integration:
+            # Widen the HNSW search for this transaction only, so the pooled
+            # connection goes back with the server default
+            await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(HNSW_EF_SEARCH)}"))
+
+            # Using SQLAlchemy pgvector integration. Only the columns we return
+            # are selected: loading whole ORM rows would ship and decode each
+            # 384-dim embedding and track every chunk in the identity map.
+            cos_dist = DocumentChunk.embedding.cosine_distance(query_embedding)
             result = await db.execute(
-                select(DocumentChunk, DocumentChunk.embedding.cosine_distance(query_embedding).label("cos_dist"))
-                .order_by(DocumentChunk.embedding.cosine_distance(query_embedding))
+                select(
+                    DocumentChunk.document_name,
+                    DocumentChunk.page,
+                    DocumentChunk.text_content,
+                    cos_dist.label("cos_dist"),
+                )
+                .where(cos_dist <= 1.0 - threshold)
+                .order_by(cos_dist)
                 .limit(top_k)
             )
             
             rows = result.all()
-            for chunk_obj, dist in rows:
+            for document_name, page, text_content, dist in rows:
                 # Recover original cosine similarity from the pgvector distance
                 # Cosine Similarity = 1.0 - cosine_distance
                 # E.g., if dist is 0.15, similarity is 0.85
@@ -60,33 +206,80 @@ class Retriever:
                 
                 if similarity >= threshold:
                     chunk_dict = {
-                        "document": chunk_obj.document_name,
-                        "page": chunk_obj.page,
-                        "text": chunk_obj.text_content,
+                        "document": document_name,
+                        "page": page,
+                        "text": text_content,
                         "relevance_score": round(similarity, 4)
                     }
                     relevant_chunks.append(chunk_dict)
                     
         return relevant_chunks
         
-    def retrieve(self, query: str, top_k: int = None, threshold: float = None) -> List[Dict]:
-        """Synchronous wrapper for retrieve_async."""
-        import asyncio
+    async def retrieve_batch(self, queries: List[str], top_k: int = None, threshold: float = None,
+                             session_factory=None) -> List[List[Dict]]:
+        """
+        Retrieve chunks for several queries at once.
         
-        # Check if an event loop is already running
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = None
-            
-        if loop and loop.is_running():
-            # If we're already in an async context, we can't run asyncio.run()
-            # This is a temporary bridging if main.py caller is not awaited
-            import nest_asyncio
-            nest_asyncio.apply()
-            return asyncio.run(self.retrieve_async(query, top_k, threshold))
-        else:
-            return asyncio.run(self.retrieve_async(query, top_k, threshold))
+        Embeds the queries off the event loop (concurrent embed_query_async
+        calls coalesce into one model batch) and fetches every query's top_k
+        in a single round trip: one ORDER BY ... LIMIT branch per query (each
+        served by the HNSW index) combined with UNION ALL. Returns one chunk
+        list per query, in input order.
+        session_factory overrides AsyncSessionLocal for callers on another event loop.
+        """
+        if not queries:
+            return []
+        top_k = top_k or TOP_K
+        threshold = threshold or SIMILARITY_THRESHOLD
+        session_factory = session_factory or AsyncSessionLocal
+        
+        query_embeddings = await asyncio.gather(*map(self.embed_query_async, queries))
+        
+        branches = []
+        for i, query_embedding in enumerate(query_embeddings):
+            cos_dist = DocumentChunk.embedding.cosine_distance(query_embedding)
+            branches.append(
+                select(
+                    literal(i).label("query_idx"),
+                    DocumentChunk.document_name,
+                    DocumentChunk.page,
+                    DocumentChunk.text_content,
+                    cos_dist.label("cos_dist"),
+                )
+                .where(cos_dist <= 1.0 - threshold)
+                .order_by(cos_dist)
+                .limit(top_k)
+            )
+        
+        results = [[] for _ in queries]
+        async with session_factory() as db:
+            await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(HNSW_EF_SEARCH)}"))
+            rows = (await db.execute(union_all(*branches))).all()
+        
+        # UNION ALL doesn't promise to keep each branch's ORDER BY, so restore it
+        for query_idx, document_name, page, text_content, dist in sorted(rows, key=lambda r: (r[0], r[4])):
+            similarity = 1.0 - float(dist)
+            if similarity >= threshold:
+                results[query_idx].append({
+                    "document": document_name,
+                    "page": page,
+                    "text": text_content,
+                    "relevance_score": round(similarity, 4)
+                })
+        return results
+        
+    def retrieve(self, query: str, top_k: int = None, threshold: float = None) -> List[Dict]:
+        """
+        Synchronous wrapper for retrieve_async, for scripts and worker threads.
+
+        Async code should await retrieve_async directly: calling this from a
+        coroutine blocks its event loop until the query finishes.
+        """
+        loop = _get_bridge_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self.retrieve_async(query, top_k, threshold, session_factory=_bridge_sessions), loop
+        )
+        return future.result()
             
     def build_context(self, chunks: List[Dict]) -> str:
         """Build context string from retrieved chunks for the LLM prompt."""
@@ -99,3 +292,23 @@ class Retriever:
             context_parts.append(f"--- Context {i} {source} ---\n{chunk['text']}")
         
         return "\n\n".join(context_parts)
+
+
+if __name__ == "__main__":
+    import sys
+    
+    async def run_queries(queries: List[str]):
+        retriever = Retriever()
+        for query, chunks in zip(queries, await retriever.retrieve_batch(queries)):
+            print(f"\nQuery: \"{query}\"")
+            for chunk in chunks:
+                print(f"  {chunk['relevance_score']:.4f}  {chunk['document']} (p{chunk['page']}): {chunk['text'][:80]}...")
+            if not chunks:
+                print("  (no chunks above the similarity threshold)")
+    
+    # Usage: python -m backend.rag.retriever "question one" "question two" ...
+    asyncio.run(run_queries(sys.argv[1:] or [
+        "What is the price of the Pro plan?",
+        "How do I set up SSO?",
+        "What is the capital of France?",
+    ]))
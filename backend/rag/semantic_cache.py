@@ -0,0 +1,68 @@
+"""
+Semantic Cache — Reuse answers for near-duplicate questions.
+
+Keeps the embeddings of previously answered questions in a flat in-memory
+matrix. A new question whose cosine similarity to a cached one clears the
+threshold (and whose conversation history matches) gets the cached response
+back without another retrieval or LLM round trip.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def history_hash(history: List[Dict]) -> bytes:
+    """Digest of the formatted conversation history a response was generated with."""
+    return hashlib.blake2b(json.dumps(history, sort_keys=True).encode(), digest_size=16).digest()
+
+
+class SemanticCache:
+    """Inner-product index over normalized query embeddings with LRU eviction."""
+
+    def __init__(self, dim: int, threshold: float = 0.95, maxsize: int = 10_000):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._valid = np.zeros(maxsize, dtype=bool)
+        # slot -> (question, response, history digest), oldest first
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._free = list(range(maxsize - 1, -1, -1))
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, embedding, history_digest: bytes) -> Optional[Any]:
+        """Return the cached response for the closest matching question, or None."""
+        if not self._entries:
+            return None
+
+        scores = self._vectors @ self._normalize(embedding)
+        scores[~self._valid] = -1.0
+
+        # Best score first among the few slots above the threshold
+        candidates = np.flatnonzero(scores >= self.threshold)
+        for slot in candidates[np.argsort(-scores[candidates])]:
+            slot = int(slot)
+            _question, response, digest = self._entries[slot]
+            if digest == history_digest:
+                self._entries.move_to_end(slot)
+                return response
+        return None
+
+    def insert(self, embedding, question: str, response: Any, history_digest: bytes):
+        """Cache a response, evicting the least recently used entry when full."""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot, _ = self._entries.popitem(last=False)
+
+        self._vectors[slot] = self._normalize(embedding)
+        self._valid[slot] = True
+        self._entries[slot] = (question, response, history_digest)
@@ -15,7 +15,8 @@ Routes:
 
 import re
 import time
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Tuple
 from backend.config import MODEL_SIMPLE, MODEL_COMPLEX
 
 
@@ -24,6 +25,18 @@ GREETING_PATTERNS = [
     r'\b(hi|hello|hey|howdy|greetings|good\s+(morning|afternoon|evening))\b',
     r'\b(thanks|thank\s+you|bye|goodbye|see\s+you|cheers)\b',
 ]
+# Any of the above, compiled once so matching is a single search
+_GREETING_RE = re.compile("|".join(f"(?:{p})" for p in GREETING_PATTERNS))
+
+# Whole-message greetings that GREETING_PATTERNS would match anyway; checked by
+# set lookup so bare "hi"/"thanks" messages skip the rule evaluation entirely
+GREETINGS = frozenset({
+    "hi", "hello", "hey", "howdy", "greetings", "cheers",
+    "hi there", "hello there", "hey there",
+    "good morning", "good afternoon", "good evening",
+    "thanks", "thank you", "thanks again",
+    "bye", "goodbye", "bye bye", "see you",
+})
 
 # Keywords that indicate complexity
 COMPLEX_KEYWORDS = [
@@ -43,6 +56,9 @@ COMPLAINT_KEYWORDS = [
     "help me", "stuck", "confused"
 ]
 
+# Distinct normalized queries whose routing decision is kept in memory
+CLASSIFY_CACHE_SIZE = 4096
+
 
 def classify_query(query: str) -> Dict:
     """
@@ -55,27 +71,31 @@ def classify_query(query: str) -> Dict:
             "signals": ["list of triggered signals"]
         }
     """
-    query_lower = query.lower().strip()
+    # Routing is deterministic in the normalized text, so repeats are served from cache
+    classification, model, signals = _classify_normalized(" ".join(query.lower().split()))
+    return {
+        "classification": classification,
+        "model_used": model,
+        "signals": list(signals)
+    }
+
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def _classify_normalized(query_lower: str) -> Tuple[str, str, Tuple[str, ...]]:
+    """Apply the routing rules to a lowercased, whitespace-collapsed query."""
     words = query_lower.split()
     word_count = len(words)
     signals = []
     complexity_score = 0
     
     # Rule 1: Check for greetings/farewells (→ simple)
-    is_greeting = False
-    for pattern in GREETING_PATTERNS:
-        if re.search(pattern, query_lower):
-            is_greeting = True
-            signals.append("greeting_detected")
-            break
+    is_greeting = _GREETING_RE.search(query_lower) is not None
+    if is_greeting:
+        signals.append("greeting_detected")
     
     # If it's purely a greeting (short), classify as simple immediately
     if is_greeting and word_count <= 5:
-        return {
-            "classification": "simple",
-            "model_used": MODEL_SIMPLE,
-            "signals": signals
-        }
+        return "simple", MODEL_SIMPLE, tuple(signals)
     
     # Rule 2: Word count
     if word_count >= 15:
@@ -99,7 +119,7 @@ def classify_query(query: str) -> Dict:
         signals.append(f"complex_keyword: {complex_keywords_found[0]}")
     
     # Rule 4: Multiple question marks (multi-part question)
-    question_marks = query.count("?")
+    question_marks = query_lower.count("?")
     if question_marks >= 2:
         complexity_score += 2
         signals.append(f"multi_question ({question_marks} question marks)")
@@ -132,11 +152,13 @@ def classify_query(query: str) -> Dict:
     if not signals:
         signals.append("no_special_signals")
     
-    return {
-        "classification": classification,
-        "model_used": model,
-        "signals": signals
-    }
+    return classification, model, tuple(signals)
+
+
+def is_bare_greeting(query: str) -> bool:
+    """True when the whole query is a short greeting/farewell from GREETINGS."""
+    query_lower = query.lower().strip(" !?.,")
+    return len(query_lower.split()) <= 2 and query_lower in GREETINGS
 
 
 def create_routing_log(query: str, classification: str, model_used: str,